@@ -9,6 +9,59 @@ import os
 import sys
 from pathlib import Path
 
+def _parse_env(path):
+    """逐行解析env文件为字典，避免多次全文扫描
+
+    Args:
+        path: env文件路径
+
+    Returns:
+        {配置项: 值} 字典，忽略注释和空行
+    """
+    env = {}
+    with open(path, 'r', encoding='utf-8') as f:
+        for line in f:
+            line = line.strip()
+            if not line or line.startswith('#') or '=' not in line:
+                continue
+            key, _, value = line.partition('=')
+            env[key.strip()] = value.strip()
+    return env
+
+def _is_valid_api_key(value):
+    """检查API密钥形状：sk-前缀且长度足够"""
+    return value.startswith('sk-') and len(value) >= 40
+
+def compile_env(config_file, cache_file=None):
+    """将config.env预编译为Python常量模块
+
+    生成的 src/_env_cache.py 经模块加载器导入后由.pyc缓存，
+    后续进程启动不再解析env文本文件。
+
+    Args:
+        config_file: config.env文件路径
+        cache_file: 输出模块路径，默认为 src/_env_cache.py
+
+    Returns:
+        生成的缓存模块路径
+    """
+    config_file = Path(config_file)
+    if cache_file is None:
+        cache_file = config_file.parent / "src" / "_env_cache.py"
+
+    env = _parse_env(config_file)
+    lines = [
+        "# 由 setup_config.py 自动生成，请勿手工编辑",
+        "# 重新运行 python setup_config.py 可更新",
+        "",
+    ]
+    for key, value in env.items():
+        lines.append(f"{key} = {value!r}")
+
+    with open(cache_file, 'w', encoding='utf-8') as f:
+        f.write("\n".join(lines) + "\n")
+    return cache_file
+
 def setup_config():
     """设置配置文件"""
     print("🔧 金融术语加载工具 - 配置设置向导")
@@ -24,17 +77,17 @@ def setup_config():
         
         # 检查是否有有效的API密钥
         try:
-            with open(config_file, 'r', encoding='utf-8') as f:
-                content = f.read()
-                if 'OPENAI_API_KEY=your-openai-api-key-here' in content:
-                    print("⚠️  发现默认API密钥，需要更新")
-                    need_update = True
-                elif 'OPENAI_API_KEY=' in content and 'sk-' in content:
-                    print("✅ 发现已配置的API密钥")
-                    need_update = False
-                else:
-                    print("⚠️  API密钥配置可能不完整")
-                    need_update = True
+            env = _parse_env(config_file)
+            existing_key = env.get('OPENAI_API_KEY', '')
+            if existing_key == 'your-openai-api-key-here':
+                print("⚠️  发现默认API密钥，需要更新")
+                need_update = True
+            elif _is_valid_api_key(existing_key):
+                print("✅ 发现已配置的API密钥")
+                need_update = False
+            else:
+                print("⚠️  API密钥配置可能不完整")
+                need_update = True
         except Exception as e:
             print(f"❌ 读取配置文件失败: {e}")
             need_update = True
@@ -117,9 +170,13 @@ EMBEDDING_DIM=3072
 
 # 性能配置
 BATCH_SIZE={batch_size}
-INSERT_BATCH_SIZE=1000
+INSERT_BATCH_SIZE=5000
 TEST_MODE_LIMIT=
 
+# 嵌入结果本地缓存（重复导入相同术语时跳过OpenAI调用）
+EMBED_CACHE=true
+EMBED_CACHE_FILE=db/embed_cache.sqlite
+
 # =============================================================================
 # LangChain高级配置（可选）
 # =============================================================================
@@ -140,6 +197,14 @@ TEST_MODE_LIMIT=
             f.write(config_content)
         
         print(f"\n✅ 配置文件已保存到: {config_file}")
+
+        # 预编译为Python常量模块，加速后续进程启动
+        try:
+            cache_file = compile_env(config_file)
+            print(f"✅ 环境缓存已生成: {cache_file}")
+        except Exception as e:
+            print(f"⚠️  生成环境缓存失败（不影响使用）: {e}")
+
         print("\n🚀 配置完成！现在可以运行以下命令:")
         print("   python src/example_usage.py        # 运行主程序")
         print("   python src/search_example.py       # 搜索示例")
@@ -163,14 +228,14 @@ def validate_config():
     print("🔍 验证配置文件...")
     
     try:
-        with open(config_file, 'r', encoding='utf-8') as f:
-            content = f.read()
-        
+        env = _parse_env(config_file)
+
         # 检查API密钥
-        if 'OPENAI_API_KEY=your-openai-api-key-here' in content:
+        api_key = env.get('OPENAI_API_KEY', '')
+        if api_key == 'your-openai-api-key-here':
             print("❌ API密钥仍然是默认值，请重新配置")
             return False
-        elif 'OPENAI_API_KEY=sk-' in content:
+        elif _is_valid_api_key(api_key):
             print("✅ API密钥配置正确")
         else:
             print("⚠️  API密钥配置可能有问题")
@@ -4,8 +4,30 @@ import os
 from dotenv import load_dotenv
 from pathlib import Path
 
-# 自动加载config.env（或.env）
-load_dotenv(dotenv_path="config.env")
+# 优先使用预编译的环境缓存（由setup_config.py生成），省去env文件解析；
+# 缓存缺失或已过期（config.env在生成之后又被手工编辑）时回退到load_dotenv
+def _env_cache_fresh():
+    """缓存模块比config.env新时才可用，手工改过配置后不吃旧值"""
+    cache_file = Path(__file__).parent / "_env_cache.py"
+    config_file = Path(__file__).parent.parent / "config.env"
+    try:
+        cache_mtime = cache_file.stat().st_mtime
+    except OSError:
+        return False
+    try:
+        config_mtime = config_file.stat().st_mtime
+    except OSError:
+        # 配置文件不存在，缓存即唯一来源
+        return True
+    return cache_mtime >= config_mtime
+
+if _env_cache_fresh():
+    import _env_cache
+    for _key in dir(_env_cache):
+        if _key.isupper():
+            os.environ.setdefault(_key, str(getattr(_env_cache, _key)))
+else:
+    load_dotenv(dotenv_path="config.env")
 
 # 初始化加载器（假设环境变量已配置好）
 loader = FinanceTermLoader()
@@ -14,13 +36,11 @@ loader = FinanceTermLoader()
 def search_terms(query):
     try:
         results = loader.search_similar_terms(query, top_k=5)
-        # 转为表格展示
+        # 转为表格展示（join一次拼接，避免逐行字符串累加）
         if not results:
             return "未找到相关术语。"
-        table = "| 术语 | 类别 | 相似度 |\n|---|---|---|\n"
-        for item in results:
-            table += f"| {item['term']} | {item['category']} | {item['score']:.4f} |\n"
-        return table
+        rows = [f"| {item['term']} | {item['category']} | {item['score']:.4f} |" for item in results]
+        return "| 术语 | 类别 | 相似度 |\n|---|---|---|\n" + "\n".join(rows)
     except Exception as e:
         return f"查询出错: {e}"
 
@@ -29,60 +49,52 @@ def import_terms_with_progress(file):
     if file is None:
         yield "请先上传CSV文件。", 0, 0
         return
-    import pandas as pd
-    df = pd.read_csv(file, header=None, names=['term', 'category'])
-    embed_progress = 0
-    insert_progress = 0
-    total_embed = len(df['term'])
-    total_insert = len(df)
-    # 进度回调函数
-    def on_embed_progress(done, total):
-        nonlocal embed_progress
-        embed_progress = min(done / total, 1)
-        yield_msg = f"OpenAI嵌入进度: {done}/{total}"
-        # 只在嵌入阶段更新
-        yield (yield_msg, embed_progress, 0)
-    def on_insert_progress(done, total):
-        nonlocal insert_progress
-        insert_progress = min(done / total, 1)
-        yield_msg = f"Milvus写入进度: {done}/{total}"
-        # 只在插入阶段更新
-        yield (yield_msg, 1, insert_progress)
-    # 由于yield不能直接在回调里用，需用生成器代理
-    # 嵌入进度
-    embed_batches = []
+    # 流式导入：不在这里物化DataFrame，loader逐块读取CSV并立即开始嵌入
+    csv_path = getattr(file, 'name', file)
+    # 生产者-消费者队列：回调入队，生成器阻塞消费，无需轮询等待
+    import queue
+    import threading
+    q = queue.Queue()
+
+    # 进度回调直接把事件放入队列（queue.Queue本身线程安全）
     def embed_proxy(done, total):
-        embed_batches.append((done, total))
-    insert_batches = []
+        q.put(('embed', done, total))
     def insert_proxy(done, total):
-        insert_batches.append((done, total))
+        q.put(('insert', done, total))
+
     # 调用loader
-    import threading
-    result = {}
     def run_loader():
-        nonlocal result
-        result = loader.process_and_import(df, on_embed_progress=embed_proxy, on_insert_progress=insert_proxy)
-    t = threading.Thread(target=run_loader)
+        try:
+            result = loader.process_and_import_stream(csv_path, on_embed_progress=embed_proxy, on_insert_progress=insert_proxy)
+            q.put(('done', result))
+        except Exception as e:
+            q.put(('error', e))
+    t = threading.Thread(target=run_loader, daemon=True)
     t.start()
-    last_embed = 0
-    last_insert = 0
-    while t.is_alive() or embed_batches or insert_batches:
-        # 优先显示嵌入进度
-        if embed_batches:
-            done, total = embed_batches.pop(0)
-            embed_progress = min(done / total, 1)
-            yield (f"嵌入进度: {done}/{total}", embed_progress, 0)
-            last_embed = embed_progress
-        elif insert_batches:
-            done, total = insert_batches.pop(0)
-            insert_progress = min(done / total, 1)
-            yield (f"Milvus插入进度: {done}/{total}", 1, insert_progress)
-            last_insert = insert_progress
+
+    # 每个阶段的总数只取一次倒数，之后进度计算只做乘法
+    inv_embed_total = None
+    inv_insert_total = None
+    while True:
+        kind, *payload = q.get()
+        if kind == 'embed':
+            done, total = payload
+            if inv_embed_total is None:
+                inv_embed_total = 1.0 / total if total else 0.0
+            yield (f"嵌入进度: {done}/{total}", min(done * inv_embed_total, 1.0), 0)
+        elif kind == 'insert':
+            done, total = payload
+            if inv_insert_total is None:
+                inv_insert_total = 1.0 / total if total else 0.0
+            yield (f"Milvus插入进度: {done}/{total}", 1, min(done * inv_insert_total, 1.0))
+        elif kind == 'error':
+            yield (f"导入出错: {payload[0]}", 0, 0)
+            return
         else:
-            import time
-            time.sleep(0.1)
-    # 完成
-    yield (f"导入成功！\n\n- 术语总数: {result.get('total_terms', '-') }\n- 集合名: {result.get('collection_name', '-') }\n- 嵌入模型: {result.get('embedding_model', '-') }\n- 嵌入维度: {result.get('embedding_dim', '-') }", 1, 1)
+            # 完成
+            result = payload[0]
+            yield (f"导入成功！\n\n- 术语总数: {result.get('total_terms', '-') }\n- 集合名: {result.get('collection_name', '-') }\n- 嵌入模型: {result.get('embedding_model', '-') }\n- 嵌入维度: {result.get('embedding_dim', '-') }", 1, 1)
+            return
 
 with gr.Blocks() as demo:
     gr.Markdown("# 金融术语标准化工具")
@@ -1,18 +1,95 @@
-import pandas as pd
-from langchain_openai import OpenAIEmbeddings
-from pymilvus import connections, Collection, CollectionSchema, FieldSchema, DataType, utility
+import numpy as np
+import csv
+import functools
+import hashlib
 import os
+import queue
+import sqlite3
+import threading
 import time
+import unicodedata
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from typing import List, Dict, Any, Optional
 from tqdm import tqdm
 import logging
 
+# pymilvus导入上百个子模块，冷启动代价约秒级；延迟到首次使用时填充，
+# 只补仍为None的名字，测试按模块属性打桩的假对象不会被覆盖
+connections = None
+Collection = None
+CollectionSchema = None
+FieldSchema = None
+DataType = None
+utility = None
+
+
+def _load_pymilvus():
+    """按需导入pymilvus并填充模块全局名（已填充或已被打桩的名字跳过）"""
+    global connections, Collection, CollectionSchema, FieldSchema, DataType, utility
+    if None not in (connections, Collection, CollectionSchema, FieldSchema, DataType, utility):
+        return
+    import pymilvus
+    if connections is None:
+        connections = pymilvus.connections
+    if Collection is None:
+        Collection = pymilvus.Collection
+    if CollectionSchema is None:
+        CollectionSchema = pymilvus.CollectionSchema
+    if FieldSchema is None:
+        FieldSchema = pymilvus.FieldSchema
+    if DataType is None:
+        DataType = pymilvus.DataType
+    if utility is None:
+        utility = pymilvus.utility
+
+# 环境变量默认值，__init__中一次性批量读取
+_ENV_DEFAULTS = {
+    'OPENAI_API_KEY': None,
+    'MILVUS_HOST': 'localhost',
+    'MILVUS_PORT': '19530',
+    'MILVUS_COLLECTION_NAME': 'finance_term',
+    'DB_FILE': 'db/milvus_lite.db',
+    'EMBEDDING_MODEL': 'text-embedding-3-large',
+    'EMBEDDING_DIM': '3072',
+    'BATCH_SIZE': '500',
+    'TEST_MODE_LIMIT': '0',
+    'INSERT_BATCH_SIZE': '5000',
+    'FLUSH_EVERY_N_BATCHES': '0',
+    'EMBED_CONCURRENCY': '8',
+}
+
+
+def _put_until_stopped(batch_queue: "queue.Queue", item, stop_event: "threading.Event") -> bool:
+    """向有界队列放入item，消费端已停止时放弃
+
+    消费端异常退出后队列可能一直满着，无超时的put会让生产者线程
+    永久阻塞；这里轮询stop_event，停止信号到达即返回False。
+    """
+    while not stop_event.is_set():
+        try:
+            batch_queue.put(item, timeout=0.1)
+            return True
+        except queue.Full:
+            continue
+    return False
+
+
+def _int_env(cfg: Dict[str, Any], key: str, default: int) -> int:
+    """解析整数配置项，空白或非法值统一回退为默认值
+
+    这些配置均为非负整数，先isdigit判断再转换，
+    常态路径上不走异常控制流
+    """
+    value = (cfg.get(key) or '').strip()
+    return int(value) if value.isdigit() else default
+
+
 class FinanceTermLoader:
     """
     金融术语加载工具类
     用于读取CSV文件中的金融术语，生成嵌入向量并存储到Milvus数据库
     """
-    
+
     def __init__(self, openai_api_key: Optional[str] = None, milvus_host: Optional[str] = None, milvus_port: Optional[int] = None):
         """
         初始化加载器
@@ -22,57 +99,91 @@ class FinanceTermLoader:
             milvus_host: Milvus服务器地址，如果不提供则从环境变量MILVUS_HOST读取，默认为localhost
             milvus_port: Milvus服务器端口，如果不提供则从环境变量MILVUS_PORT读取，默认为19530
         """
-        # 从环境变量获取配置
-        self.openai_api_key = openai_api_key or os.getenv('OPENAI_API_KEY')
-        self.milvus_host = milvus_host or os.getenv('MILVUS_HOST', 'localhost')
+        # 一次性批量读取环境变量，每项只做一次字典查找
+        environ = os.environ
+        cfg = {key: environ.get(key, default) for key, default in _ENV_DEFAULTS.items()}
+
+        self.openai_api_key = openai_api_key or cfg['OPENAI_API_KEY']
+        self.milvus_host = milvus_host or cfg['MILVUS_HOST']
         # 处理端口号，支持无效值
-        try:
-            self.milvus_port = milvus_port or int(os.getenv('MILVUS_PORT', '19530'))
-        except ValueError:
-            self.milvus_port = 19530  # 使用默认端口
-        
+        self.milvus_port = milvus_port or _int_env(cfg, 'MILVUS_PORT', 19530)
+
         # 验证必需的配置
         if not self.openai_api_key:
             raise ValueError("OpenAI API密钥未提供。请通过参数传入或设置环境变量OPENAI_API_KEY")
-        
-        # 设置环境变量给LangChain使用
-        os.environ['OPENAI_API_KEY'] = self.openai_api_key
-        
+
         # 其他配置从环境变量获取，提供默认值
-        self.collection_name = os.getenv('MILVUS_COLLECTION_NAME', 'finance_term')
-        self.db_path = os.getenv('DB_FILE', 'db/milvus_lite.db')
-        self.embedding_model = os.getenv('EMBEDDING_MODEL', 'text-embedding-3-large')
-        self.embedding_dim = int(os.getenv('EMBEDDING_DIM', '3072'))  # text-embedding-3-large的向量维度
-        # 处理批次大小，支持空字符串
-        batch_size_str = os.getenv('BATCH_SIZE', '500').strip()
-        self.batch_size = int(batch_size_str) if batch_size_str else 500  # 批处理大小
-        # 处理测试模式限制，支持空字符串
-        test_limit_str = os.getenv('TEST_MODE_LIMIT', '0').strip()
-        self.test_mode_limit = int(test_limit_str) if test_limit_str else 0  # 测试模式限制
+        self.collection_name = cfg['MILVUS_COLLECTION_NAME']
+        self.db_path = cfg['DB_FILE']
+        self.embedding_model = cfg['EMBEDDING_MODEL']
+        self.embedding_dim = _int_env(cfg, 'EMBEDDING_DIM', 3072)  # text-embedding-3-large的向量维度
+        self.batch_size = _int_env(cfg, 'BATCH_SIZE', 500)  # 批处理大小（空字符串回退默认）
+        self.test_mode_limit = _int_env(cfg, 'TEST_MODE_LIMIT', 0)  # 测试模式限制
+        self.insert_batch_size = _int_env(cfg, 'INSERT_BATCH_SIZE', 5000)  # 插入批次大小
+        self.flush_every_n_batches = _int_env(cfg, 'FLUSH_EVERY_N_BATCHES', 0)  # 0=仅结束时刷新
+        self.embed_concurrency = max(1, _int_env(cfg, 'EMBED_CONCURRENCY', 8))  # 嵌入并发批次数
         
-        # 初始化LangChain OpenAI嵌入模型
+        # 初始化LangChain OpenAI嵌入模型（按需导入，避免拖慢CLI启动；
+        # 密钥经构造参数传入，不写回os.environ污染进程全局状态）
+        from langchain_openai import OpenAIEmbeddings
         self.embeddings = OpenAIEmbeddings(
-            model=self.embedding_model
+            model=self.embedding_model,
+            openai_api_key=self.openai_api_key
         )
+
+        # 查询向量LRU缓存：金融术语查询重复度高，
+        # 命中缓存的查询不再产生OpenAI网络往返
+        self._embed_query_cached = functools.lru_cache(maxsize=4096)(self._embed_query)
+
+        # MilvusClient惰性创建并复用，避免每次查询重新握手
+        self._client = None
         
         # 配置日志
         logging.basicConfig(level=logging.INFO)
         self.logger = logging.getLogger(__name__)
         
-    def read_csv_data(self, csv_path: str) -> pd.DataFrame:
+    def read_csv_data(self, csv_path: str) -> "pd.DataFrame":
         """
         读取CSV文件
-        
+
         Args:
             csv_path: CSV文件路径
-            
+
         Returns:
             包含术语数据的DataFrame
         """
+        import pandas as pd
+        try:
+            # pyarrow的CSV解析为多线程向量化实现，比pandas默认解析器快数倍
+            import pyarrow as pa
+            import pyarrow.csv as pacsv
+        except ImportError:
+            pa = None
+            pacsv = None
         try:
+            # 空文件直接返回空DataFrame（pyarrow和pandas对零字节文件都会报错）
+            if os.path.getsize(csv_path) == 0:
+                self.logger.info("CSV文件为空，共0条记录")
+                return pd.DataFrame(columns=['term', 'category'])
+
             # 读取CSV文件，假设第一列是术语名称，第二列是类别
-            df = pd.read_csv(csv_path, header=None, names=['term', 'category'])
-            
+            if pacsv is not None:
+                # pyarrow按列批量解析，避免逐单元格构建Python对象
+                table = pacsv.read_csv(
+                    csv_path,
+                    read_options=pacsv.ReadOptions(
+                        column_names=['term', 'category'],
+                        autogenerate_column_names=False
+                    ),
+                    convert_options=pacsv.ConvertOptions(
+                        column_types={'term': pa.string(), 'category': pa.string()}
+                    )
+                )
+                # 下游按DataFrame列切片，这里从Arrow表零拷贝转换
+                df = table.to_pandas()
+            else:
+                df = pd.read_csv(csv_path, header=None, names=['term', 'category'])
+
             # 如果设置了测试模式限制，只取前N条数据
             if self.test_mode_limit > 0:
                 original_count = len(df)
@@ -86,71 +197,148 @@ class FinanceTermLoader:
             self.logger.error(f"读取CSV文件失败: {e}")
             raise
     
-    def generate_embeddings(self, texts: List[str], batch_size: Optional[int] = None) -> List[List[float]]:
+    def generate_embeddings(self, texts: List[str], batch_size: Optional[int] = None) -> np.ndarray:
         """
         生成文本嵌入向量
-        
+
         Args:
             texts: 文本列表
             batch_size: 批处理大小，如果不提供则使用配置中的默认值
-            
+
         Returns:
-            嵌入向量列表
+            float32嵌入向量数组，形状为(len(texts), embedding_dim)
         """
         if batch_size is None:
             batch_size = self.batch_size
-            
-        embeddings = []
-        total_batches = (len(texts) + batch_size - 1) // batch_size
-        
+
+        # 开启EMBED_CACHE后，已缓存的术语直接从本地库读取，只嵌入未命中的部分
+        if os.getenv('EMBED_CACHE', 'false').lower() == 'true':
+            return self._generate_embeddings_cached(texts, batch_size)
+
+        return self._embed_texts(texts, batch_size)
+
+    def _embed_texts(self, texts: List[str], batch_size: int) -> np.ndarray:
+        """并发调用OpenAI接口生成嵌入向量（不经过本地缓存）"""
+        batch_starts = list(range(0, len(texts), batch_size))
+        total_batches = len(batch_starts)
+
         self.logger.info(f"开始生成嵌入向量，总数: {len(texts)}，批大小: {batch_size}，批次数: {total_batches}")
-        
+
         start_time = time.time()
-        
-        for i in tqdm(range(0, len(texts), batch_size), 
-                     desc="生成嵌入向量", 
-                     unit="batch",
-                     total=total_batches):
-            batch_texts = texts[i:i + batch_size]
-            batch_start_time = time.time()
-            
-            try:
-                # 使用LangChain的embed_documents方法
-                batch_embeddings = self.embeddings.embed_documents(batch_texts)
-                embeddings.extend(batch_embeddings)
-                
-                batch_time = time.time() - batch_start_time
-                processed = i + len(batch_texts)
-                
-                # 估算剩余时间
-                if processed > 0:
-                    elapsed_time = time.time() - start_time
-                    avg_time_per_item = elapsed_time / processed
-                    remaining_items = len(texts) - processed
-                    estimated_remaining = avg_time_per_item * remaining_items
-                    
-                    self.logger.info(
-                        f"批次完成: {len(batch_texts)}条，"
-                        f"累计处理: {processed}/{len(texts)}，"
-                        f"批次耗时: {batch_time:.1f}s，"
-                        f"估计剩余: {estimated_remaining/60:.1f}分钟"
-                    )
-                
-                # 减少延迟，只在处理大量数据时适当休息
-                if batch_size >= 100:
-                    time.sleep(0.05)  # 减少延迟
-                    
-            except Exception as e:
-                self.logger.error(f"生成嵌入向量失败: {e}")
-                raise
-        
+
+        # 嵌入调用是I/O密集型（网络往返），并发发起多个批次请求，
+        # 并发数通过EMBED_CONCURRENCY控制以配合账号速率限制（__init__中解析）
+        max_workers = self.embed_concurrency
+
+        # 预分配float32数组，各批次直接写入对应切片；
+        # 相比Python float的list-of-lists省掉每个元素的装箱开销
+        all_embeddings = np.empty((len(texts), self.embedding_dim), dtype=np.float32)
+
+        try:
+            with ThreadPoolExecutor(max_workers=min(max_workers, max(total_batches, 1))) as executor:
+                # 记录每个future对应的批次起点，完成后写入原位置
+                future_to_start = {
+                    executor.submit(self.embeddings.embed_documents, texts[start:start + batch_size]): start
+                    for start in batch_starts
+                }
+
+                processed = 0
+                # 进度、速率与ETA交给tqdm显示，最多刷新100次，
+                # 逐批日志降级为DEBUG并先判级别，避免热路径上的格式化开销
+                with tqdm(total=total_batches, desc="生成嵌入向量", unit="batch",
+                          miniters=max(1, total_batches // 100)) as pbar:
+                    for future in as_completed(future_to_start):
+                        start = future_to_start[future]
+                        batch_embeddings = future.result()
+                        all_embeddings[start:start + len(batch_embeddings)] = batch_embeddings
+                        processed += len(batch_embeddings)
+                        pbar.update(1)
+
+                        if self.logger.isEnabledFor(logging.DEBUG):
+                            self.logger.debug(
+                                f"批次完成: {len(batch_embeddings)}条，"
+                                f"累计处理: {processed}/{len(texts)}"
+                            )
+        except Exception as e:
+            self.logger.error(f"生成嵌入向量失败: {e}")
+            raise
+
         total_time = time.time() - start_time
         self.logger.info(f"嵌入向量生成完成，总耗时: {total_time/60:.1f}分钟，平均每条: {total_time/len(texts):.2f}秒")
-        
-        return embeddings
-    
+
+        return all_embeddings
+
+    def _embed_cache_key(self, text: str) -> str:
+        """计算术语的缓存键（模型+内容寻址，换模型自动失效）"""
+        return hashlib.sha1(f"{self.embedding_model}:{text}".encode('utf-8')).hexdigest()
+
+    def _open_embed_cache(self) -> sqlite3.Connection:
+        """打开（必要时创建）本地嵌入缓存数据库"""
+        cache_path = os.getenv('EMBED_CACHE_FILE', 'db/embed_cache.sqlite')
+        cache_dir = os.path.dirname(cache_path)
+        if cache_dir:
+            os.makedirs(cache_dir, exist_ok=True)
+        conn = sqlite3.connect(cache_path)
+        conn.execute("CREATE TABLE IF NOT EXISTS embed_cache (key TEXT PRIMARY KEY, vec BLOB)")
+        return conn
+
+    def _generate_embeddings_cached(self, texts: List[str], batch_size: int) -> np.ndarray:
+        """生成嵌入向量，已缓存的术语从本地库读取，仅嵌入未命中部分"""
+        conn = self._open_embed_cache()
+        try:
+            all_embeddings = np.empty((len(texts), self.embedding_dim), dtype=np.float32)
+
+            # 同一术语可能重复出现，按唯一键查询一次即可
+            keys = [self._embed_cache_key(t) for t in texts]
+            key_to_indices: Dict[str, List[int]] = {}
+            for i, key in enumerate(keys):
+                key_to_indices.setdefault(key, []).append(i)
+
+            # 分块IN查询，避免超出SQLite绑定变量上限
+            hits: Dict[str, np.ndarray] = {}
+            unique_keys = list(key_to_indices)
+            chunk_size = 500
+            for i in range(0, len(unique_keys), chunk_size):
+                chunk = unique_keys[i:i + chunk_size]
+                placeholders = ','.join('?' * len(chunk))
+                for key, blob in conn.execute(
+                        f"SELECT key, vec FROM embed_cache WHERE key IN ({placeholders})", chunk):
+                    hits[key] = np.frombuffer(blob, dtype=np.float32)
+
+            miss_keys: List[str] = []
+            miss_count = 0
+            for key, indices in key_to_indices.items():
+                vec = hits.get(key)
+                if vec is None:
+                    miss_keys.append(key)
+                    miss_count += len(indices)
+                else:
+                    all_embeddings[indices] = vec
+
+            self.logger.info(f"嵌入缓存命中: {len(texts) - miss_count}/{len(texts)} 条")
+
+            if miss_keys:
+                # 每个唯一键只嵌入一次，重复出现的术语共享同一向量
+                miss_texts = [texts[key_to_indices[key][0]] for key in miss_keys]
+                miss_embeddings = self._embed_texts(miss_texts, batch_size)
+                new_rows = []
+                for key, emb in zip(miss_keys, miss_embeddings):
+                    all_embeddings[key_to_indices[key]] = emb
+                    new_rows.append((key, emb.tobytes()))
+                # 单事务批量写回新向量
+                with conn:
+                    conn.executemany(
+                        "INSERT OR IGNORE INTO embed_cache (key, vec) VALUES (?, ?)",
+                        new_rows
+                    )
+
+            return all_embeddings
+        finally:
+            conn.close()
+
     def connect_milvus(self):
         """连接到Milvus数据库"""
+        _load_pymilvus()
         try:
             # 确保db目录存在
             os.makedirs("db", exist_ok=True)
@@ -193,14 +381,39 @@ class FinanceTermLoader:
             else:
                 raise
     
+    def _schema_matches(self, collection: "Collection") -> bool:
+        """检查已有集合的字段名与向量维度是否与当前配置一致"""
+        try:
+            fields = {field.name: field for field in collection.schema.fields}
+            if set(fields) != {'id', 'term', 'category', 'embedding'}:
+                return False
+            return fields['embedding'].params.get('dim') == self.embedding_dim
+        except Exception:
+            return False
+
     def create_collection(self):
-        """创建Milvus集合"""
+        """创建Milvus集合
+
+        默认删除重建已有集合，保证重复导入是幂等的全量替换（主键为
+        auto_id、插入无去重，复用集合继续insert会追加重复数据）。
+        设置REUSE_COLLECTION=true且schema匹配时复用已有集合——仅适用
+        于追加新术语的增量导入场景。
+        """
+        _load_pymilvus()
         try:
-            # 如果集合已存在，删除它
+            reuse_existing = os.getenv('REUSE_COLLECTION', 'false').lower() == 'true'
+
+            # 如果集合已存在：显式要求复用且schema匹配时复用，否则删除重建
             if utility.has_collection(self.collection_name):
+                if reuse_existing:
+                    existing = Collection(self.collection_name)
+                    if self._schema_matches(existing):
+                        self.logger.info(f"复用已存在的集合: {self.collection_name}")
+                        return existing
+                    self.logger.info(f"集合schema与当前配置不一致，重建: {self.collection_name}")
                 utility.drop_collection(self.collection_name)
                 self.logger.info(f"删除已存在的集合: {self.collection_name}")
-            
+
             # 定义字段
             fields = [
                 FieldSchema(name="id", dtype=DataType.INT64, is_primary=True, auto_id=True),
@@ -221,7 +434,7 @@ class FinanceTermLoader:
             self.logger.error(f"创建集合失败: {e}")
             raise
     
-    def create_index(self, collection: Collection):
+    def create_index(self, collection: "Collection"):
         """为向量字段创建索引"""
         try:
             index_params = {
@@ -239,29 +452,37 @@ class FinanceTermLoader:
             self.logger.error(f"创建索引失败: {e}")
             raise
     
-    def insert_data(self, collection: Collection, df: pd.DataFrame, embeddings: List[List[float]]):
+    def insert_data(self, collection: "Collection", df: "pd.DataFrame", embeddings: List[List[float]]):
         """分批插入数据到集合"""
         try:
-            # 获取配置的批次大小，用于插入，支持空字符串
-            insert_batch_size_str = os.getenv('INSERT_BATCH_SIZE', '1000').strip()
-            insert_batch_size = int(insert_batch_size_str) if insert_batch_size_str else 1000
+            # 批次大小与刷新频率在__init__中解析一次；
+            # 每次insert调用的gRPC开销固定，大批次摊薄该开销
+            insert_batch_size = self.insert_batch_size
+            flush_every = self.flush_every_n_batches
             total_records = len(df)
             total_batches = (total_records + insert_batch_size - 1) // insert_batch_size
             
             self.logger.info(f"开始分批插入数据，总计 {total_records} 条，分 {total_batches} 批，每批 {insert_batch_size} 条")
-            
+
             inserted_count = 0
-            
+
+            # 一次性取出底层数组，循环内的切片是零拷贝视图，
+            # 避免每批构造新的pandas Series
+            terms = df['term'].to_numpy(copy=False)
+            categories = df['category'].to_numpy(copy=False)
+            emb_array = np.asarray(embeddings, dtype=np.float32)
+
             # 分批插入数据
             for batch_idx in tqdm(range(total_batches), desc="插入数据", unit="batch"):
                 start_idx = batch_idx * insert_batch_size
                 end_idx = min(start_idx + insert_batch_size, total_records)
-                
-                # 准备当前批次的数据
+
+                # 准备当前批次的数据；float32二维切片直接传给pymilvus，
+                # 向量经buffer protocol序列化，不经过逐元素的Python float转换
                 batch_data = [
-                    df['term'].iloc[start_idx:end_idx].tolist(),
-                    df['category'].iloc[start_idx:end_idx].tolist(),
-                    embeddings[start_idx:end_idx]
+                    terms[start_idx:end_idx].tolist(),
+                    categories[start_idx:end_idx].tolist(),
+                    emb_array[start_idx:end_idx]
                 ]
                 
                 # 插入当前批次
@@ -270,12 +491,12 @@ class FinanceTermLoader:
                 inserted_count += current_batch_size
                 
                 self.logger.info(f"批次 {batch_idx + 1}/{total_batches} 插入完成: {current_batch_size} 条，累计: {inserted_count}/{total_records}")
-                
-                # 如果是大批次，中间刷新一下
-                if batch_idx % 5 == 0 or batch_idx == total_batches - 1:
+
+                # flush是封闭段并强制落盘的重量级RPC，仅在显式配置时周期执行
+                if flush_every and (batch_idx + 1) % flush_every == 0:
                     collection.flush()
                     self.logger.info(f"已刷新数据到磁盘，当前进度: {inserted_count}/{total_records}")
-            
+
             # 最终刷新集合以确保所有数据被写入
             collection.flush()
             
@@ -309,15 +530,16 @@ class FinanceTermLoader:
             # 4. 创建集合
             self.logger.info("创建集合...")
             collection = self.create_collection()
-            
-            # 5. 插入数据
-            self.logger.info("插入数据...")
-            self.insert_data(collection, df, embeddings)
-            
-            # 6. 创建索引
+
+            # 5. 创建索引（先建索引，段在封闭时即被索引，
+            #    省去插入完成后对全部向量的重建扫描）
             self.logger.info("创建索引...")
             self.create_index(collection)
-            
+
+            # 6. 插入数据
+            self.logger.info("插入数据...")
+            self.insert_data(collection, df, embeddings)
+
             # 7. 加载集合
             collection.load()
             
@@ -335,6 +557,10 @@ class FinanceTermLoader:
             self.logger.error(f"加载金融术语失败: {e}")
             raise
 
+    def _embed_query(self, query: str) -> np.ndarray:
+        """生成单条查询的float32嵌入向量（结果被lru_cache缓存，调用方只读）"""
+        return np.asarray(self.embeddings.embed_query(query), dtype=np.float32)
+
     def search_similar_terms(self, query: str, top_k: int = 5) -> List[Dict[str, Any]]:
         """
         使用milvusClient（pymilvus）进行相似性搜索。
@@ -345,11 +571,15 @@ class FinanceTermLoader:
             包含术语、类别和相似度分数的字典列表
         """
         from pymilvus import MilvusClient
-        # 1. 生成查询词的embedding
-        embedding = self.embeddings.embed_query(query)
-        # 2. 初始化milvusClient
-        uri = self.db_path if os.getenv('MILVUS_USE_LITE', 'true').lower() == 'true' else f"{self.milvus_host}:{self.milvus_port}"
-        client = MilvusClient(uri=uri)
+        # 1. 生成查询词的embedding（NFKC归一化+strip后走缓存，同义变体也能命中）
+        # float32 ndarray走buffer protocol，pymilvus无需逐元素重新打包
+        normalized_query = unicodedata.normalize('NFKC', query.strip())
+        embedding = self._embed_query_cached(normalized_query)
+        # 2. 初始化milvusClient（惰性创建并复用，长连接避免每次查询握手）
+        if self._client is None:
+            uri = self.db_path if os.getenv('MILVUS_USE_LITE', 'true').lower() == 'true' else f"{self.milvus_host}:{self.milvus_port}"
+            self._client = MilvusClient(uri=uri)
+        client = self._client
         # 3. 查询
         search_result = client.search(
             collection_name=self.collection_name,
@@ -359,14 +589,14 @@ class FinanceTermLoader:
             search_params={"metric_type": "COSINE"}
         )
         # 4. 解析结果
-        output = []
-        for hit in search_result[0]:
-            output.append({
-                "term":  hit['entity'].get("term") or "",
-                "category":  hit['entity'].get("category") or "",
-                "score": hit.get("distance") or hit.get("score") or 0
-            })
-        return output
+        return [
+            {
+                "term": hit['entity'].get("term", ""),
+                "category": hit['entity'].get("category", ""),
+                "score": hit.get("distance", hit.get("score", 0))
+            }
+            for hit in search_result[0]
+        ]
 
     def init_milvus_data(self, csv_path: str = "data/万条金融标准术语.csv"):
         """
@@ -381,6 +611,10 @@ class FinanceTermLoader:
     def process_and_import(self, df, on_embed_progress=None, on_insert_progress=None):
         """
         处理DataFrame，分批生成嵌入并分批插入Milvus，支持进度回调。
+
+        嵌入与插入通过有界队列流水线化：生产者线程逐批调用OpenAI，
+        主线程同时把已完成的批次写入Milvus，两段I/O相互重叠，
+        峰值内存也只保留队列中少量批次的向量。
         Args:
             df: 金融术语DataFrame，需包含'term'和'category'列
             on_embed_progress: 嵌入进度回调，参数(done, total)
@@ -388,37 +622,73 @@ class FinanceTermLoader:
         Returns:
             统计信息字典
         """
-        texts = df['term'].tolist()
+        terms = df['term'].to_numpy(copy=False).tolist()
+        categories = df['category'].to_numpy(copy=False).tolist()
         batch_size = self.batch_size
-        embeddings = []
-        total = len(texts)
-        for i in range(0, total, batch_size):
-            batch_texts = texts[i:i + batch_size]
-            batch_embeddings = self.embeddings.embed_documents(batch_texts)
-            embeddings.extend(batch_embeddings)
-            if on_embed_progress:
-                on_embed_progress(i + len(batch_texts), total)
-        # 连接Milvus
+        total = len(terms)
+
+        # 先建好连接、集合与索引，第一批向量一出队就能写入，
+        # 段封闭时随写随建索引，避免导入完成后的全量重建
         self.connect_milvus()
         collection = self.create_collection()
-        # 插入数据
-        insert_batch_size = int(os.getenv('INSERT_BATCH_SIZE', '1000'))
-        total_records = len(df)
+        self.create_index(collection)
+
+        # 有界队列限制在途批次数量，防止嵌入远快于插入时内存膨胀
+        batch_queue: queue.Queue = queue.Queue(maxsize=4)
+        producer_error: List[BaseException] = []
+        stop_event = threading.Event()
+
+        def produce_embeddings():
+            try:
+                for i in range(0, total, batch_size):
+                    if stop_event.is_set():
+                        return
+                    batch_terms = terms[i:i + batch_size]
+                    batch_embeddings = np.asarray(
+                        self.embeddings.embed_documents(batch_terms), dtype=np.float32)
+                    if not _put_until_stopped(
+                            batch_queue,
+                            (batch_terms, categories[i:i + batch_size], batch_embeddings),
+                            stop_event):
+                        return
+                    if on_embed_progress:
+                        on_embed_progress(i + len(batch_terms), total)
+            except BaseException as e:
+                producer_error.append(e)
+            finally:
+                # 哨兵值通知消费端结束
+                _put_until_stopped(batch_queue, None, stop_event)
+
+        producer = threading.Thread(target=produce_embeddings, daemon=True)
+        producer.start()
+
         inserted_count = 0
-        for batch_idx in range(0, total_records, insert_batch_size):
-            start_idx = batch_idx
-            end_idx = min(start_idx + insert_batch_size, total_records)
-            batch_data = [
-                df['term'].iloc[start_idx:end_idx].tolist(),
-                df['category'].iloc[start_idx:end_idx].tolist(),
-                embeddings[start_idx:end_idx]
-            ]
-            collection.insert(batch_data)
-            inserted_count = end_idx
-            if on_insert_progress:
-                on_insert_progress(inserted_count, total_records)
+        try:
+            while True:
+                item = batch_queue.get()
+                if item is None:
+                    break
+                batch_terms, batch_categories, batch_embeddings = item
+                # float32数组直接传给pymilvus，经buffer protocol序列化
+                collection.insert([batch_terms, batch_categories, batch_embeddings])
+                inserted_count += len(batch_terms)
+                if on_insert_progress:
+                    on_insert_progress(inserted_count, total)
+        finally:
+            # 插入失败时先停住生产者再抛出：置停止标志并清空队列，
+            # 否则生产者会永久阻塞在有界队列的put上（线程泄漏）
+            stop_event.set()
+            while True:
+                try:
+                    batch_queue.get_nowait()
+                except queue.Empty:
+                    break
+
+        producer.join()
+        if producer_error:
+            raise producer_error[0]
+
         collection.flush()
-        self.create_index(collection)
         collection.load()
         return {
             "total_terms": len(df),
@@ -427,6 +697,111 @@ class FinanceTermLoader:
             "embedding_dim": self.embedding_dim
         }
 
+    def process_and_import_stream(self, csv_path, chunk_size: Optional[int] = None,
+                                  on_embed_progress=None, on_insert_progress=None):
+        """
+        流式读取CSV并分块嵌入、插入Milvus，支持进度回调。
+
+        与process_and_import的流水线相同，但CSV用标准库csv逐行读取，
+        全程不物化DataFrame：每块嵌入后即入队插入并丢弃，
+        峰值内存与文件大小无关，第一块数据读到后立即开始嵌入。
+        Args:
+            csv_path: CSV文件路径，第一列为术语，第二列为类别
+            chunk_size: 每块行数，默认使用batch_size
+            on_embed_progress: 嵌入进度回调，参数(done, total)
+            on_insert_progress: 插入进度回调，参数(done, total)
+        Returns:
+            统计信息字典
+        """
+        if chunk_size is None:
+            chunk_size = self.batch_size
+
+        # 预先快速统计总行数用于进度显示（仅缓冲读取，不解析字段）
+        with open(csv_path, 'r', encoding='utf-8') as f:
+            total = sum(1 for line in f if line.strip())
+
+        self.connect_milvus()
+        collection = self.create_collection()
+        self.create_index(collection)
+
+        batch_queue: queue.Queue = queue.Queue(maxsize=4)
+        producer_error: List[BaseException] = []
+        stop_event = threading.Event()
+
+        def produce_chunks():
+            embedded = 0
+
+            def emit(chunk_terms, chunk_categories):
+                nonlocal embedded
+                chunk_embeddings = np.asarray(
+                    self.embeddings.embed_documents(chunk_terms), dtype=np.float32)
+                if not _put_until_stopped(
+                        batch_queue, (chunk_terms, chunk_categories, chunk_embeddings),
+                        stop_event):
+                    return False
+                embedded += len(chunk_terms)
+                if on_embed_progress:
+                    on_embed_progress(embedded, total)
+                return True
+
+            try:
+                with open(csv_path, 'r', encoding='utf-8', newline='') as f:
+                    chunk_terms: List[str] = []
+                    chunk_categories: List[str] = []
+                    for row in csv.reader(f):
+                        if not row:
+                            continue
+                        chunk_terms.append(row[0])
+                        chunk_categories.append(row[1] if len(row) > 1 else '')
+                        if len(chunk_terms) >= chunk_size:
+                            if not emit(chunk_terms, chunk_categories):
+                                return
+                            chunk_terms, chunk_categories = [], []
+                    if chunk_terms:
+                        emit(chunk_terms, chunk_categories)
+            except BaseException as e:
+                producer_error.append(e)
+            finally:
+                _put_until_stopped(batch_queue, None, stop_event)
+
+        producer = threading.Thread(target=produce_chunks, daemon=True)
+        producer.start()
+
+        inserted_count = 0
+        try:
+            while True:
+                item = batch_queue.get()
+                if item is None:
+                    break
+                batch_terms, batch_categories, batch_embeddings = item
+                # float32数组直接传给pymilvus，经buffer protocol序列化
+                collection.insert([batch_terms, batch_categories, batch_embeddings])
+                inserted_count += len(batch_terms)
+                if on_insert_progress:
+                    on_insert_progress(inserted_count, total)
+        finally:
+            # 插入失败时先停住生产者再抛出：置停止标志并清空队列，
+            # 否则生产者会永久阻塞在有界队列的put上（线程泄漏）
+            stop_event.set()
+            while True:
+                try:
+                    batch_queue.get_nowait()
+                except queue.Empty:
+                    break
+
+        producer.join()
+        if producer_error:
+            raise producer_error[0]
+
+        collection.flush()
+        collection.load()
+        return {
+            "total_terms": inserted_count,
+            "collection_name": self.collection_name,
+            "embedding_model": self.embedding_model,
+            "embedding_dim": self.embedding_dim
+        }
+
 
 # 使用示例
 if __name__ == "__main__":
@@ -0,0 +1,148 @@
+#!/usr/bin/env python3
+"""
+共享测试fixture
+"""
+
+import sys
+from pathlib import Path
+from types import SimpleNamespace
+from unittest.mock import MagicMock
+
+import pytest
+
+# 添加src目录到Python路径
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+# 顶层预导入被测模块：conftest在每个xdist worker启动时加载一次，
+# 模块导入（及其numpy/tqdm依赖）的开销在这里预热，不落到首个用例上
+from finance_term_loader import FinanceTermLoader
+
+# 共享的模拟向量常量：3072维列表只在收集阶段构造一次，
+# 各测试直接引用，避免每个用例重复分配 [x] * 3072
+DIM = 3072
+VEC_A = [0.1] * DIM
+VEC_B = [0.2] * DIM
+VEC_C = [0.3] * DIM
+VEC_D = [0.4] * DIM
+
+
+class FakeEmb:
+    """轻量嵌入模型桩，替代MagicMock省去属性代理开销
+
+    vectors指定每次调用返回的向量列表；不传时按输入长度
+    返回VEC_A。收到的批次记录在calls里，断言调用次数用
+    len(fake.calls)即可。
+    """
+
+    def __init__(self, vectors=None):
+        self.vectors = vectors
+        self.calls = []
+
+    def embed_documents(self, texts):
+        self.calls.append(list(texts))
+        if self.vectors is not None:
+            return self.vectors
+        return [VEC_A for _ in texts]
+
+
+@pytest.fixture(scope="module")
+def base_loader():
+    """模块级共享的默认配置加载器
+
+    只设置OPENAI_API_KEY，同一测试文件内的用例复用同一实例，
+    省去每个用例重复构造loader的开销。测试可直接覆盖batch_size
+    等批次属性，_restore_loader_config会在用例结束后自动还原；
+    需要其他特殊配置的测试应自行构造loader。
+    """
+    with pytest.MonkeyPatch.context() as mp:
+        mp.setenv('OPENAI_API_KEY', 'test-key')
+        yield FinanceTermLoader()
+
+
+@pytest.fixture(autouse=True)
+def _restore_loader_config(request):
+    """自动还原共享loader上被用例覆盖的批次配置
+
+    base_loader/mock_loader跨用例共享同一实例，测试会直接改写
+    batch_size、insert_batch_size做场景设置；这里在用例前快照、
+    用例后还原，后续用例拿到的仍是默认配置。只处理当前用例实际
+    请求了的共享fixture，不会额外触发构造。
+    """
+    shared = [request.getfixturevalue(name)
+              for name in ('base_loader', 'mock_loader')
+              if name in request.fixturenames]
+    saved = [(loader, loader.batch_size, loader.insert_batch_size)
+             for loader in shared]
+    yield
+    for loader, batch_size, insert_batch_size in saved:
+        loader.batch_size = batch_size
+        loader.insert_batch_size = insert_batch_size
+
+
+@pytest.fixture(autouse=True)
+def milvus_mocks(monkeypatch):
+    """自动把loader模块内的pymilvus入口替换为MagicMock
+
+    finance_term_loader按惰性导入约定把pymilvus的名字放在模块全局，
+    这里统一用monkeypatch替换，测试不再各自堆叠@patch装饰器，也
+    不会真正触发pymilvus导入或连接。需要断言调用的测试通过返回的
+    SimpleNamespace访问对应mock。
+    """
+    import finance_term_loader as ftl
+
+    mocks = SimpleNamespace(
+        connections=MagicMock(),
+        Collection=MagicMock(),
+        CollectionSchema=MagicMock(),
+        FieldSchema=MagicMock(),
+        DataType=MagicMock(),
+        utility=MagicMock(),
+    )
+    # 默认按"集合不存在"处理，走创建路径
+    mocks.utility.has_collection.return_value = False
+
+    for name in ('connections', 'Collection', 'CollectionSchema',
+                 'FieldSchema', 'DataType', 'utility'):
+        monkeypatch.setattr(ftl, name, getattr(mocks, name))
+    return mocks
+
+
+@pytest.fixture(scope="session")
+def sample_csv_path(tmp_path_factory):
+    """会话级共享的示例CSV文件
+
+    与正式数据格式一致：无表头，第一列术语、第二列类别。
+    整个测试会话只写一次磁盘，只读用例直接复用。
+    """
+    path = tmp_path_factory.mktemp("data") / "sample_terms.csv"
+    rows = [
+        ('银行', 'FINTERM'),
+        ('贷款', 'FINTERM'),
+        ('投资', 'FINTERM'),
+        ('股票', 'FINTERM'),
+        ('债券', 'FINTERM'),
+    ]
+    path.write_text(
+        "\n".join(f"{term},{category}" for term, category in rows) + "\n",
+        encoding='utf-8'
+    )
+    return path
+
+
+@pytest.fixture(scope="session")
+def empty_csv(tmp_path_factory):
+    """会话级空CSV文件（零字节，应读出0条记录）"""
+    path = tmp_path_factory.mktemp("data") / "empty.csv"
+    path.write_text("", encoding='utf-8')
+    return path
+
+
+@pytest.fixture(scope="session")
+def invalid_csv(tmp_path_factory):
+    """会话级结构错误的CSV文件
+
+    数据格式为无表头两列，这里第二行多出一列，解析应当报错。
+    """
+    path = tmp_path_factory.mktemp("data") / "invalid.csv"
+    path.write_text("银行,FINTERM\n贷款,FINTERM,多余字段\n", encoding='utf-8')
+    return path
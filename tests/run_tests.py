@@ -9,29 +9,67 @@ import os
 from pathlib import Path
 
 
+def _run_pytest(pytest_args):
+    """优先在当前进程内运行pytest，失败时回退到子进程
+
+    Args:
+        pytest_args: 传给pytest的参数列表（不含"python -m pytest"前缀）
+
+    Returns:
+        pytest返回码
+    """
+    try:
+        import pytest
+        return pytest.main(list(pytest_args))
+    except ImportError:
+        # pytest不可导入时退回子进程方式。
+        # stdout/stderr显式置None让子进程直接继承文件描述符，
+        # 输出零拷贝直达终端；PYTHONUNBUFFERED=1避免管道缓冲延迟进度显示
+        result = subprocess.run(
+            [sys.executable, "-m", "pytest"] + list(pytest_args),
+            cwd=Path(__file__).parent.parent,
+            stdout=None,
+            stderr=None,
+            env={**os.environ, "PYTHONUNBUFFERED": "1"}
+        )
+        return result.returncode
+
+
 def run_tests():
     """运行所有测试"""
     
     print("🧪 开始运行金融术语加载工具测试套件")
     print("=" * 50)
     
-    # 检查是否安装了pytest
-    try:
-        import pytest
+    # 检查是否安装了pytest：find_spec只查找模块不执行导入，
+    # 比try-import快且不会提前把pytest加载进当前进程
+    import importlib.util
+    if importlib.util.find_spec("pytest") is not None:
         print("✅ pytest 已安装")
-    except ImportError:
+    else:
         print("❌ pytest 未安装，正在安装...")
-        subprocess.run([sys.executable, "-m", "pip", "install", "pytest>=7.0.0", "pytest-mock>=3.10.0"])
+        subprocess.run([sys.executable, "-m", "pip", "install",
+                        "pytest>=7.0.0", "pytest-mock>=3.10.0", "pytest-xdist>=3.5.0"])
         print("✅ pytest 安装完成")
     
     # 设置测试环境
     os.environ['PYTHONPATH'] = str(Path(__file__).parent / "src")
-    
+
+    # 并行参数：默认按CPU数开worker，loadgroup把同一xdist_group的
+    # 集成测试钉在同一个worker上，其余用例自由分发；
+    # 设置 PYTEST_WORKERS=0 可退回串行（便于调试单个用例）；
+    # pytest-xdist未安装时同样退回串行，而不是让pytest报未知参数
+    xdist_args = ["-n", "auto", "--dist", "loadgroup"]
+    if (os.environ.get('PYTEST_WORKERS') == '0'
+            or importlib.util.find_spec("xdist") is None):
+        xdist_args = []
+
     # 运行测试
     test_commands = [
         # 快速测试（仅模拟，不需要API）
-        ["python", "-m", "pytest", "tests/", "-v", "-m", "not slow"],
-        
+        ["python", "-m", "pytest", "tests/", "-v", "-m", "not slow",
+         "-p", "no:cacheprovider"] + xdist_args,
+
         # 所有测试
         # ["python", "-m", "pytest", "tests/", "-v"],
         
@@ -44,13 +82,15 @@ def run_tests():
     for i, cmd in enumerate(test_commands, 1):
         print(f"\n🚀 运行测试命令 {i}: {' '.join(cmd)}")
         print("-" * 40)
-        
+
         try:
-            result = subprocess.run(cmd, cwd=Path(__file__).parent, capture_output=False)
-            if result.returncode == 0:
+            # 在当前进程内调用pytest，省掉一次解释器冷启动；
+            # cmd前三项是"python -m pytest"，其余即pytest参数
+            returncode = _run_pytest(cmd[3:])
+            if returncode == 0:
                 print(f"✅ 测试命令 {i} 执行成功")
             else:
-                print(f"❌ 测试命令 {i} 执行失败，返回码: {result.returncode}")
+                print(f"❌ 测试命令 {i} 执行失败，返回码: {returncode}")
                 return False
         except Exception as e:
             print(f"❌ 测试命令 {i} 执行异常: {e}")
@@ -78,36 +118,64 @@ def run_specific_test(test_name):
     print(f"🧪 运行特定测试: {test_file}")
     
     try:
-        result = subprocess.run(
-            ["python", "-m", "pytest", test_file, "-v"],
-            cwd=Path(__file__).parent
-        )
-        return result.returncode == 0
+        return _run_pytest([test_file, "-v"]) == 0
     except Exception as e:
         print(f"❌ 测试执行异常: {e}")
         return False
 
 
+def _requirements_satisfied(dependencies):
+    """检查依赖是否已全部安装且满足版本要求
+
+    只查包元数据，不导入包本身；无法判断时返回False交给pip处理。
+    """
+    from importlib.metadata import version, PackageNotFoundError
+    try:
+        from packaging.requirements import Requirement
+    except ImportError:
+        return False
+
+    for dep in dependencies:
+        req = Requirement(dep)
+        try:
+            installed = version(req.name)
+        except PackageNotFoundError:
+            return False
+        if not req.specifier.contains(installed, prereleases=True):
+            return False
+    return True
+
+
 def install_dependencies():
     """安装测试依赖"""
     print("📦 安装测试依赖...")
-    
+
     dependencies = [
         "pytest>=7.0.0",
         "pytest-mock>=3.10.0",
+        "pytest-xdist>=3.5.0",
         "pandas>=2.0.0",
         "python-dotenv>=1.0.0"
     ]
     
-    for dep in dependencies:
-        print(f"安装 {dep}...")
-        try:
-            subprocess.run([sys.executable, "-m", "pip", "install", dep], check=True)
-            print(f"✅ {dep} 安装成功")
-        except subprocess.CalledProcessError as e:
-            print(f"❌ {dep} 安装失败: {e}")
-            return False
-    
+    # 已满足时直接跳过，不为幂等安装付一次pip启动+解析的代价
+    if _requirements_satisfied(dependencies):
+        print("✅ 所有测试依赖已满足，跳过安装")
+        return True
+
+    # 一次pip调用装齐全部依赖：pip只做一轮依赖解析，
+    # 并免去每个包一次的pip进程启动开销
+    print(f"安装 {', '.join(dependencies)}...")
+    try:
+        subprocess.run(
+            [sys.executable, "-m", "pip", "install",
+             "--no-input", "--disable-pip-version-check", "--quiet"] + dependencies,
+            check=True
+        )
+    except subprocess.CalledProcessError as e:
+        print(f"❌ 依赖安装失败: {e}")
+        return False
+
     print("✅ 所有测试依赖安装完成")
     return True
 
@@ -5,14 +5,9 @@
 
 import os
 import pytest
-import tempfile
-from pathlib import Path
 from unittest.mock import patch, MagicMock
-import sys
-
-# 添加src目录到Python路径
-sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
 
+# 导入路径由pyproject.toml的pythonpath配置（src）提供
 from finance_term_loader import FinanceTermLoader
 
 
@@ -82,28 +77,25 @@ class TestConfiguration:
             assert loader.batch_size == 500
             assert loader.test_mode_limit == 0
     
-    def test_config_file_loading(self):
+    def test_config_file_loading(self, tmp_path):
         """测试配置文件加载"""
-        # 创建临时配置文件
-        with tempfile.NamedTemporaryFile(mode='w', suffix='.env', delete=False) as f:
-            f.write('OPENAI_API_KEY=file-api-key\n')
-            f.write('BATCH_SIZE=200\n')
-            f.write('MILVUS_HOST=file-host\n')
-            config_file = f.name
-        
-        try:
-            # 使用dotenv加载配置文件
+        # tmp_path由pytest管理，无需手工unlink清理
+        config_file = tmp_path / "config.env"
+        config_file.write_text(
+            'OPENAI_API_KEY=file-api-key\n'
+            'BATCH_SIZE=200\n'
+            'MILVUS_HOST=file-host\n'
+        )
+
+        # patch.dict快照环境，load_dotenv写入的变量不会泄漏给其他测试
+        with patch.dict(os.environ):
             from dotenv import load_dotenv
             load_dotenv(config_file)
-            
+
             loader = FinanceTermLoader()
             assert loader.openai_api_key == 'file-api-key'
             assert loader.batch_size == 200
             assert loader.milvus_host == 'file-host'
-            
-        finally:
-            # 清理临时文件
-            os.unlink(config_file)
     
     def test_milvus_lite_configuration(self):
         """测试Milvus Lite配置"""
@@ -115,22 +107,25 @@ class TestConfiguration:
             # 这里我们只测试配置加载，不测试实际连接
             assert loader.openai_api_key == 'test-key'
     
-    def test_batch_size_configuration(self):
-        """测试批处理大小配置"""
-        test_cases = [
-            ('100', 100),
-            ('500', 500),
-            ('1000', 1000),
-            ('', 500),  # 空字符串应该使用默认值
-        ]
-        
-        for env_value, expected in test_cases:
-            with patch.dict(os.environ, {
-                'OPENAI_API_KEY': 'test-key',
-                'BATCH_SIZE': env_value
-            }):
-                loader = FinanceTermLoader()
-                assert loader.batch_size == expected
+    @pytest.mark.parametrize("batch_size,insert_batch_size,expected_batch,expected_insert", [
+        ('100', '500', 100, 500),
+        ('300', '800', 300, 800),
+        ('500', '1000', 500, 1000),
+        ('1000', '2000', 1000, 2000),
+        ('', '1000', 500, 1000),  # 空字符串使用默认BATCH_SIZE
+        ('300', '', 300, 5000),   # 空字符串使用默认INSERT_BATCH_SIZE
+    ])
+    def test_batch_size_configuration(self, batch_size, insert_batch_size,
+                                      expected_batch, expected_insert):
+        """测试批处理大小配置（嵌入批次与插入批次，含默认值）"""
+        with patch.dict(os.environ, {
+            'OPENAI_API_KEY': 'test-key',
+            'BATCH_SIZE': batch_size,
+            'INSERT_BATCH_SIZE': insert_batch_size
+        }):
+            loader = FinanceTermLoader()
+            assert loader.batch_size == expected_batch
+            assert loader.insert_batch_size == expected_insert
 
 
 class TestConfigurationValidation:
@@ -4,75 +4,48 @@ FinanceTermLoader 核心功能测试
 """
 
 import os
+import threading
+import time
+
 import pytest
 import pandas as pd
-import tempfile
-from pathlib import Path
-from unittest.mock import patch, MagicMock, mock_open
-import sys
-
-# 添加src目录到Python路径
-sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+from unittest.mock import patch, MagicMock
 
+# 导入路径由pyproject.toml的pythonpath配置（src与tests）提供
 from finance_term_loader import FinanceTermLoader
+from conftest import DIM, VEC_A, VEC_B, VEC_C, VEC_D, FakeEmb
+
+
+@pytest.fixture(scope="class")
+def mock_loader():
+    """创建模拟的FinanceTermLoader实例（每个测试类共享一个实例）"""
+    with patch.dict(os.environ, {'OPENAI_API_KEY': 'test-key'}):
+        return FinanceTermLoader()
 
 
 class TestFinanceTermLoader:
     """FinanceTermLoader主要功能测试"""
     
-    @pytest.fixture
-    def mock_loader(self):
-        """创建模拟的FinanceTermLoader实例"""
-        with patch.dict(os.environ, {'OPENAI_API_KEY': 'test-key'}):
-            return FinanceTermLoader()
-    
-    @pytest.fixture
-    def sample_csv_data(self):
-        """创建示例CSV数据"""
-        return pd.DataFrame({
-            'term': ['银行', '贷款', '投资', '股票', '债券'],
-            'category': ['FINTERM', 'FINTERM', 'FINTERM', 'FINTERM', 'FINTERM']
-        })
-    
-    def test_csv_reading(self, mock_loader, sample_csv_data):
+    def test_csv_reading(self, mock_loader, sample_csv_path):
         """测试CSV文件读取功能"""
-        # 创建临时CSV文件
-        with tempfile.NamedTemporaryFile(mode='w', suffix='.csv', delete=False, encoding='utf-8') as f:
-            sample_csv_data.to_csv(f.name, index=False, encoding='utf-8')
-            csv_path = f.name
-        
-        try:
-            df = mock_loader.read_csv_data(csv_path)
-            
-            assert len(df) == 5
-            assert 'term' in df.columns
-            assert 'category' in df.columns
-            assert df['term'].iloc[0] == '银行'
-            assert all(df['category'] == 'FINTERM')
-            
-        finally:
-            os.unlink(csv_path)
-    
-    def test_csv_reading_with_test_mode(self, mock_loader, sample_csv_data):
+        df = mock_loader.read_csv_data(str(sample_csv_path))
+
+        assert len(df) == 5
+        assert 'term' in df.columns
+        assert 'category' in df.columns
+        assert df['term'].iloc[0] == '银行'
+        assert all(df['category'] == 'FINTERM')
+
+    def test_csv_reading_with_test_mode(self, sample_csv_path):
         """测试测试模式下的CSV读取"""
-        with patch.dict(os.environ, {'TEST_MODE_LIMIT': '3'}):
+        with patch.dict(os.environ, {'OPENAI_API_KEY': 'test-key', 'TEST_MODE_LIMIT': '3'}):
             loader = FinanceTermLoader()
-            
-            # 创建临时CSV文件
-            with tempfile.NamedTemporaryFile(mode='w', suffix='.csv', delete=False, encoding='utf-8') as f:
-                sample_csv_data.to_csv(f.name, index=False, encoding='utf-8')
-                csv_path = f.name
-            
-            try:
-                df = loader.read_csv_data(csv_path)
-                
-                # 应该只读取前3条记录
-                assert len(df) == 3
-                assert df['term'].iloc[0] == '银行'
-                assert df['term'].iloc[2] == '投资'
-                
-            finally:
-                os.unlink(csv_path)
+            df = loader.read_csv_data(str(sample_csv_path))
+
+            # 应该只读取前3条记录
+            assert len(df) == 3
+            assert df['term'].iloc[0] == '银行'
+            assert df['term'].iloc[2] == '投资'
     
     def test_csv_reading_missing_file(self, mock_loader):
         """测试读取不存在的CSV文件"""
@@ -83,91 +56,56 @@ class TestFinanceTermLoader:
         """测试嵌入向量生成（使用模拟）"""
         texts = ['银行', '贷款', '投资']
         
-        # 模拟LangChain嵌入模型
-        mock_embeddings = MagicMock()
-        mock_embeddings.embed_documents.return_value = [
-            [0.1] * 3072,  # 模拟3072维向量
-            [0.2] * 3072,
-            [0.3] * 3072
-        ]
-        
-        with patch.object(mock_loader, 'embeddings', mock_embeddings):
+        # 模拟LangChain嵌入模型（轻量桩，3072维向量）
+        fake_embeddings = FakeEmb(vectors=[VEC_A, VEC_B, VEC_C])
+
+        with patch.object(mock_loader, 'embeddings', fake_embeddings):
             embeddings = mock_loader.generate_embeddings(texts)
-            
+
             assert len(embeddings) == 3
-            assert len(embeddings[0]) == 3072
-            assert embeddings[0][0] == 0.1
-            assert embeddings[1][0] == 0.2
-            assert embeddings[2][0] == 0.3
-            
+            assert len(embeddings[0]) == DIM
+            assert embeddings[0][0] == pytest.approx(0.1)
+            assert embeddings[1][0] == pytest.approx(0.2)
+            assert embeddings[2][0] == pytest.approx(0.3)
+
             # 验证调用
-            mock_embeddings.embed_documents.assert_called()
+            assert fake_embeddings.calls
     
-    @patch('src.finance_term_loader.connections')
-    def test_milvus_connection_lite(self, mock_connections, mock_loader):
+    def test_milvus_connection_lite(self, milvus_mocks, mock_loader):
         """测试Milvus Lite连接"""
         with patch.dict(os.environ, {'MILVUS_USE_LITE': 'true'}):
             mock_loader.connect_milvus()
-            
+
             # 验证连接调用
-            mock_connections.connect.assert_called_once()
-            call_args = mock_connections.connect.call_args
+            milvus_mocks.connections.connect.assert_called_once()
+            call_args = milvus_mocks.connections.connect.call_args
             assert 'uri' in call_args.kwargs
             assert call_args.kwargs['uri'].endswith('milvus_lite.db')
-    
-    @patch('src.finance_term_loader.connections')
-    def test_milvus_connection_server(self, mock_connections, mock_loader):
+
+    def test_milvus_connection_server(self, milvus_mocks, mock_loader):
         """测试Milvus服务器连接"""
         with patch.dict(os.environ, {'MILVUS_USE_LITE': 'false'}):
             mock_loader.connect_milvus()
-            
+
             # 验证连接调用
-            mock_connections.connect.assert_called_once()
-            call_args = mock_connections.connect.call_args
+            milvus_mocks.connections.connect.assert_called_once()
+            call_args = milvus_mocks.connections.connect.call_args
             assert call_args.kwargs['host'] == mock_loader.milvus_host
             assert call_args.kwargs['port'] == mock_loader.milvus_port
-    
-    @patch('src.finance_term_loader.Collection')
-    def test_collection_creation(self, mock_collection_class, mock_loader):
+
+    def test_collection_creation(self, milvus_mocks, mock_loader):
         """测试集合创建"""
-        mock_collection = MagicMock()
-        mock_collection_class.return_value = mock_collection
-        
-        # 模拟集合不存在
-        with patch('src.finance_term_loader.utility.has_collection', return_value=False):
-            collection = mock_loader.create_collection()
-            
-            assert collection == mock_collection
-            mock_collection_class.assert_called_once()
-    
-    def test_batch_processing_configuration(self):
-        """测试批处理配置"""
-        test_cases = [
-            ('100', '500', 100, 500),
-            ('200', '800', 200, 800),
-            ('', '1000', 500, 1000),  # 默认BATCH_SIZE
-            ('300', '', 300, 1000),   # 默认INSERT_BATCH_SIZE
-        ]
-        
-        for batch_size, insert_batch_size, expected_batch, expected_insert in test_cases:
-            with patch.dict(os.environ, {
-                'OPENAI_API_KEY': 'test-key',
-                'BATCH_SIZE': batch_size,
-                'INSERT_BATCH_SIZE': insert_batch_size
-            }):
-                loader = FinanceTermLoader()
-                assert loader.batch_size == expected_batch
+        # 集合不存在（fixture默认值），应走创建路径
+        collection = mock_loader.create_collection()
+
+        assert collection == milvus_mocks.Collection.return_value
+        milvus_mocks.Collection.assert_called_once()
+
 
 
 class TestDataProcessing:
     """数据处理相关测试"""
     
-    @pytest.fixture
-    def mock_loader(self):
-        """创建模拟的加载器"""
-        with patch.dict(os.environ, {'OPENAI_API_KEY': 'test-key'}):
-            return FinanceTermLoader()
-    
     def test_data_insertion_mock(self, mock_loader):
         """测试数据插入（模拟）"""
         # 创建测试数据
@@ -175,96 +113,159 @@ class TestDataProcessing:
             'term': ['银行', '贷款'],
             'category': ['FINTERM', 'FINTERM']
         })
-        embeddings = [[0.1] * 3072, [0.2] * 3072]
+        embeddings = [VEC_A, VEC_B]
         
         # 模拟Milvus集合
         mock_collection = MagicMock()
         
-        # 模拟插入批次大小
-        with patch.dict(os.environ, {'INSERT_BATCH_SIZE': '1'}):
-            result = mock_loader.insert_data(mock_collection, df, embeddings)
-            
-            # 验证插入调用
-            assert mock_collection.insert.call_count == 2  # 两批次
-            assert mock_collection.flush.called
-            assert result == 2  # 返回插入的记录数
+        # 模拟插入批次大小（该配置在__init__中解析，直接覆盖实例属性）
+        mock_loader.insert_batch_size = 1
+        result = mock_loader.insert_data(mock_collection, df, embeddings)
+
+        # 验证插入调用
+        assert mock_collection.insert.call_count == 2  # 两批次
+        assert mock_collection.flush.called
+        assert result == 2  # 返回插入的记录数
     
-    def test_embedding_batch_processing(self, mock_loader):
+    def test_embedding_batch_processing(self, base_loader):
         """测试嵌入向量批处理"""
         texts = ['银行', '贷款', '投资', '股票']  # 4个文本
-        
-        # 模拟批次大小为2
-        with patch.dict(os.environ, {'BATCH_SIZE': '2'}):
-            loader = FinanceTermLoader()
-            
-            # 模拟嵌入模型
-            mock_embeddings = MagicMock()
-            mock_embeddings.embed_documents.side_effect = [
-                [[0.1] * 3072, [0.2] * 3072],  # 第一批
-                [[0.3] * 3072, [0.4] * 3072]   # 第二批
-            ]
-            
-            with patch.object(loader, 'embeddings', mock_embeddings):
-                embeddings = loader.generate_embeddings(texts)
-                
-                assert len(embeddings) == 4
-                assert mock_embeddings.embed_documents.call_count == 2
-                
-                # 验证批次调用
-                calls = mock_embeddings.embed_documents.call_args_list
-                assert calls[0][0][0] == ['银行', '贷款']  # 第一批
-                assert calls[1][0][0] == ['投资', '股票']  # 第二批
+
+        # 直接覆盖共享loader的批次大小，无需重建实例
+        base_loader.batch_size = 2
+
+        # 模拟嵌入模型（按输入返回向量，批次可能并发完成）
+        vectors = {'银行': 0.1, '贷款': 0.2, '投资': 0.3, '股票': 0.4}
+        mock_embeddings = MagicMock()
+        mock_embeddings.embed_documents.side_effect = \
+            lambda batch: [[vectors[t]] * DIM for t in batch]
+
+        with patch.object(base_loader, 'embeddings', mock_embeddings):
+            embeddings = base_loader.generate_embeddings(texts)
+
+            assert len(embeddings) == 4
+            assert mock_embeddings.embed_documents.call_count == 2
+
+            # 验证批次划分（不依赖批次完成顺序）
+            called_batches = {tuple(c[0][0]) for c in mock_embeddings.embed_documents.call_args_list}
+            assert called_batches == {('银行', '贷款'), ('投资', '股票')}
 
 
 class TestErrorHandling:
     """错误处理测试"""
     
-    def test_invalid_csv_structure(self):
+    def test_invalid_csv_structure(self, base_loader, invalid_csv):
         """测试无效的CSV文件结构"""
-        with patch.dict(os.environ, {'OPENAI_API_KEY': 'test-key'}):
-            loader = FinanceTermLoader()
-            
-            # 创建结构错误的CSV
-            invalid_data = pd.DataFrame({
-                'wrong_column': ['data1', 'data2'],
-                'another_wrong': ['data3', 'data4']
-            })
-            
-            with tempfile.NamedTemporaryFile(mode='w', suffix='.csv', delete=False) as f:
-                invalid_data.to_csv(f.name, index=False)
-                csv_path = f.name
-            
-            try:
-                # 应该处理错误或给出有意义的错误信息
-                with pytest.raises(Exception):
-                    loader.read_csv_data(csv_path)
-            finally:
-                os.unlink(csv_path)
-    
-    def test_empty_csv_file(self):
+        # 列数不一致应产生解析错误
+        with pytest.raises(Exception):
+            base_loader.read_csv_data(str(invalid_csv))
+
+    def test_empty_csv_file(self, base_loader, empty_csv):
         """测试空CSV文件"""
-        with patch.dict(os.environ, {'OPENAI_API_KEY': 'test-key'}):
-            loader = FinanceTermLoader()
-            
-            # 创建空CSV文件
-            with tempfile.NamedTemporaryFile(mode='w', suffix='.csv', delete=False) as f:
-                f.write('term,category\n')  # 只有header
-                csv_path = f.name
-            
-            try:
-                df = loader.read_csv_data(csv_path)
-                assert len(df) == 0
-            finally:
-                os.unlink(csv_path)
+        df = base_loader.read_csv_data(str(empty_csv))
+        assert len(df) == 0
+
+
+class TestImportPipeline:
+    """流水线导入测试（process_and_import / process_and_import_stream）"""
+
+    @staticmethod
+    def _assert_producer_finished(threads_before):
+        """断言流水线没有遗留生产者线程（最多等2秒让线程退出）"""
+        deadline = time.monotonic() + 2.0
+        while time.monotonic() < deadline:
+            leftover = set(threading.enumerate()) - threads_before
+            if not leftover:
+                return
+            time.sleep(0.05)
+        assert not (set(threading.enumerate()) - threads_before)
+
+    def test_stream_chunk_sizing(self, base_loader, milvus_mocks, sample_csv_path):
+        """测试流式导入按chunk_size分块嵌入、逐块插入"""
+        base_loader.batch_size = 2
+        fake_embeddings = FakeEmb()
+
+        with patch.object(base_loader, 'embeddings', fake_embeddings):
+            result = base_loader.process_and_import_stream(str(sample_csv_path))
+
+        # 5行按块大小2划分为2/2/1三块，每块各插入一次
+        assert [len(call) for call in fake_embeddings.calls] == [2, 2, 1]
+        assert milvus_mocks.Collection.return_value.insert.call_count == 3
+        assert result['total_terms'] == 5
+
+    def test_stream_progress_callbacks(self, base_loader, milvus_mocks, sample_csv_path):
+        """测试流式导入的嵌入/插入进度回调"""
+        base_loader.batch_size = 2
+        embed_events = []
+        insert_events = []
+
+        with patch.object(base_loader, 'embeddings', FakeEmb()):
+            base_loader.process_and_import_stream(
+                str(sample_csv_path),
+                on_embed_progress=lambda done, total: embed_events.append((done, total)),
+                on_insert_progress=lambda done, total: insert_events.append((done, total)),
+            )
+
+        # 两个阶段都应单调推进到(5, 5)
+        assert embed_events == [(2, 5), (4, 5), (5, 5)]
+        assert insert_events == [(2, 5), (4, 5), (5, 5)]
+
+    def test_stream_insert_failure_stops_producer(self, base_loader, milvus_mocks, sample_csv_path):
+        """测试流式导入插入失败时异常上抛且生产者线程退出"""
+        base_loader.batch_size = 2
+        milvus_mocks.Collection.return_value.insert.side_effect = RuntimeError("插入失败")
+        threads_before = set(threading.enumerate())
+
+        with patch.object(base_loader, 'embeddings', FakeEmb()):
+            with pytest.raises(RuntimeError, match="插入失败"):
+                base_loader.process_and_import_stream(str(sample_csv_path))
+
+        # 生产者不能滞留在有界队列的put上
+        self._assert_producer_finished(threads_before)
+
+    def test_dataframe_pipeline_batching(self, base_loader, milvus_mocks):
+        """测试DataFrame流水线按batch_size分批并汇报进度"""
+        base_loader.batch_size = 2
+        df = pd.DataFrame({
+            'term': ['银行', '贷款', '投资', '股票', '债券'],
+            'category': ['FINTERM'] * 5,
+        })
+        fake_embeddings = FakeEmb()
+        insert_events = []
+
+        with patch.object(base_loader, 'embeddings', fake_embeddings):
+            result = base_loader.process_and_import(
+                df,
+                on_insert_progress=lambda done, total: insert_events.append((done, total)),
+            )
+
+        assert [len(call) for call in fake_embeddings.calls] == [2, 2, 1]
+        assert milvus_mocks.Collection.return_value.insert.call_count == 3
+        assert insert_events == [(2, 5), (4, 5), (5, 5)]
+        assert result['total_terms'] == 5
+
+    def test_dataframe_insert_failure_stops_producer(self, base_loader, milvus_mocks):
+        """测试DataFrame流水线插入失败时异常上抛且生产者线程退出"""
+        base_loader.batch_size = 2
+        df = pd.DataFrame({
+            'term': ['银行', '贷款', '投资', '股票', '债券'],
+            'category': ['FINTERM'] * 5,
+        })
+        milvus_mocks.Collection.return_value.insert.side_effect = RuntimeError("插入失败")
+        threads_before = set(threading.enumerate())
+
+        with patch.object(base_loader, 'embeddings', FakeEmb()):
+            with pytest.raises(RuntimeError, match="插入失败"):
+                base_loader.process_and_import(df)
+
+        self._assert_producer_finished(threads_before)
 
 
 class TestIntegration:
     """集成测试"""
     
-    @patch('src.finance_term_loader.connections')
-    @patch('src.finance_term_loader.Collection')
-    @patch('src.finance_term_loader.utility')
-    def test_full_workflow_mock(self, mock_utility, mock_collection_class, mock_connections):
+    @pytest.mark.xdist_group(name="integration")
+    def test_full_workflow_mock(self, milvus_mocks, sample_csv_path):
         """测试完整工作流程（使用模拟）"""
         # 模拟环境
         with patch.dict(os.environ, {
@@ -272,43 +273,23 @@ class TestIntegration:
             'TEST_MODE_LIMIT': '2'
         }):
             loader = FinanceTermLoader()
-            
+
             # 模拟嵌入模型
-            mock_embeddings = MagicMock()
-            mock_embeddings.embed_documents.return_value = [
-                [0.1] * 3072,
-                [0.2] * 3072
-            ]
-            
-            # 模拟集合
-            mock_collection = MagicMock()
-            mock_collection_class.return_value = mock_collection
-            mock_utility.has_collection.return_value = False
-            
-            # 创建测试CSV
-            test_data = pd.DataFrame({
-                'term': ['银行', '贷款', '投资'],
-                'category': ['FINTERM', 'FINTERM', 'FINTERM']
-            })
-            
-            with tempfile.NamedTemporaryFile(mode='w', suffix='.csv', delete=False, encoding='utf-8') as f:
-                test_data.to_csv(f.name, index=False, encoding='utf-8')
-                csv_path = f.name
-            
-            try:
-                with patch.object(loader, 'embeddings', mock_embeddings):
-                    result = loader.load_finance_terms(csv_path)
-                    
-                    # 验证结果
-                    assert result['total_terms'] == 2  # 测试模式限制
-                    assert result['collection_name'] == 'finance_term'
-                    assert result['embedding_model'] == 'text-embedding-3-large'
-                    
-                    # 验证调用链
-                    mock_connections.connect.assert_called()
-                    mock_collection_class.assert_called()
-                    mock_collection.insert.assert_called()
-                    mock_collection.load.assert_called()
-                    
-            finally:
-                os.unlink(csv_path) 
\ No newline at end of file
+            fake_embeddings = FakeEmb(vectors=[VEC_A, VEC_B])
+
+            # 集合不存在（fixture默认值），走创建路径
+            mock_collection = milvus_mocks.Collection.return_value
+
+            with patch.object(loader, 'embeddings', fake_embeddings):
+                result = loader.load_finance_terms(str(sample_csv_path))
+
+                # 验证结果
+                assert result['total_terms'] == 2  # 测试模式限制
+                assert result['collection_name'] == 'finance_term'
+                assert result['embedding_model'] == 'text-embedding-3-large'
+
+                # 验证调用链
+                milvus_mocks.connections.connect.assert_called()
+                milvus_mocks.Collection.assert_called()
+                mock_collection.insert.assert_called()
+                mock_collection.load.assert_called() 
\ No newline at end of file